@@ -1,34 +1,70 @@
+import os
+
+import numpy as np
 import pandas as pd
 import streamlit as st
 from streamlit_folium import st_folium
 import folium
 from folium.plugins import Draw
 from shapely.geometry import shape
-from haversine import haversine
+from scipy.spatial import cKDTree
 import plotly.express as px
 
-# Load dataset
-@st.cache_data
+EARTH_RADIUS_KM = 6371.0
+
+def to_unit_xyz(lat_deg, lon_deg):
+    """Project lat/lon (degrees) onto unit-sphere Cartesian coordinates."""
+    lat = np.radians(lat_deg)
+    lon = np.radians(lon_deg)
+    return np.column_stack([
+        np.cos(lat) * np.cos(lon),
+        np.cos(lat) * np.sin(lon),
+        np.sin(lat),
+    ])
+
+# Load dataset and build the nearest-station index once per process.
+# cache_resource hands every rerun the same shared objects — no
+# hash-check or copy of the frame like cache_data does.
+@st.cache_resource
 def load_data():
-    df = pd.read_csv("Indian_GWL_Data.csv")
-    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    if os.path.exists("Indian_GWL_Data.parquet"):
+        # Parquet cache built by the FastAPI service (already parsed/cleaned)
+        df = pd.read_parquet("Indian_GWL_Data.parquet")
+    else:
+        df = pd.read_csv("Indian_GWL_Data.csv")
+        df['date'] = pd.to_datetime(df['date'], errors='coerce')
+        # Same cleaning the Parquet build applies: rows with missing
+        # coordinates would otherwise break the KDTree (NaN unit vectors)
+        df = df.dropna(subset=['date', 'latitude', 'longitude'])
     df['year'] = df['date'].dt.year
-    return df
+    unique = df.drop_duplicates(subset=["latitude", "longitude"]).reset_index(drop=True)
+    # Same unit-sphere KDTree scheme the FastAPI service uses, where chord
+    # length orders points like great-circle distance
+    tree = cKDTree(to_unit_xyz(unique["latitude"].to_numpy(), unique["longitude"].to_numpy()))
+    return df, unique, tree
 
-df = load_data()
+df, UNIQUE, TREE = load_data()
 
 st.title("Interactive Groundwater Level Finder")
 st.markdown("Draw a polygon on the map to find nearest station data.")
 
+# Precomputed dropdown/map-center lookups so widget reruns don't rescan df
+@st.cache_data
+def build_indexes():
+    state_districts = df.groupby("state_name")["district_name"].unique().apply(sorted).to_dict()
+    center = df.groupby(["state_name", "district_name"])[["latitude", "longitude"]].first().to_dict("index")
+    return state_districts, center
+
+STATE_DISTRICTS, CENTER = build_indexes()
+
 # --- Dropdowns for state and district only ---
-state = st.selectbox("Select State", sorted(df['state_name'].unique()))
-districts = sorted(df[df['state_name'] == state]['district_name'].unique())
-district = st.selectbox("Select District", districts)
+state = st.selectbox("Select State", sorted(STATE_DISTRICTS))
+district = st.selectbox("Select District", STATE_DISTRICTS[state])
 
 # Center map on the district's first station
-station_row = df[(df['state_name'] == state) & (df['district_name'] == district)].iloc[0]
-center_lat = station_row.latitude
-center_lon = station_row.longitude
+center = CENTER[(state, district)]
+center_lat = center["latitude"]
+center_lon = center["longitude"]
 
 # --- Create Folium Map (satellite + labels) ---
 m = folium.Map(location=[center_lat, center_lon], zoom_start=12, tiles=None)
@@ -74,21 +110,16 @@ if output and output.get("last_active_drawing"):
         geom = shape(output["last_active_drawing"]["geometry"])
         centroid = (geom.centroid.y, geom.centroid.x)
 
-        # Find nearest station
-        min_dist = float("inf")
-        nearest_row = None
-        for _, row in df.iterrows():
-            dist = haversine(centroid, (row.latitude, row.longitude))
-            if dist < min_dist:
-                min_dist = dist
-                nearest_row = row
-
-        if nearest_row is not None:
-            st.success(
-                f"Nearest station: **{nearest_row['station_name']}** "
-                f"({nearest_row['district_name']}, {nearest_row['state_name']}) "
-                f"— Distance: {min_dist:.2f} km"
-            )
+        # Find nearest station (KDTree query over unique stations)
+        chord, idx = TREE.query(to_unit_xyz(centroid[0], centroid[1])[0], k=1)
+        min_dist = float(2 * EARTH_RADIUS_KM * np.arcsin(chord / 2))
+        nearest_row = UNIQUE.iloc[int(idx)]
+
+        st.success(
+            f"Nearest station: **{nearest_row['station_name']}** "
+            f"({nearest_row['district_name']}, {nearest_row['state_name']}) "
+            f"— Distance: {min_dist:.2f} km"
+        )
 
         # Filter station data & clean columns
         station_data = (